@@ -9,11 +9,19 @@ It includes structured logging and advanced feature detection.
 
 import sys
 import re
+import asyncio
 import os
 import json
+import time
+import hashlib
 import logging
-from urllib.parse import urlparse
-from typing import Dict, Any
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import urlsplit
+from itertools import islice
+from typing import Annotated, Dict, Any, Iterator, List, Literal, Optional, Tuple
 
 # --- Self-Contained Configuration ---
 # All settings are now defined directly in the script.
@@ -46,7 +54,7 @@ config = {
     "reset password", "security code"
   ],
   "suspicious_sender_patterns": [
-    "@.*\\.(tk|ml|ga|cf|gq|xyz|online|site|top|bid)$"
+    "@[^@\n]*\\.(tk|ml|ga|cf|gq|xyz|online|site|top|bid)$"
   ],
   "feature_weights": {
     "has_urgency": 0.15,
@@ -58,6 +66,9 @@ config = {
     "has_sender_spoofing": 0.25,
     "has_homoglyph_chars": 0.25
   },
+  "max_text_length": 200000,
+  "max_batch_size": 100,
+  "gemini_timeout_seconds": 8.0,
   "homoglyphs": {
     "о": "o", "е": "e", "а": "a", "і": "i", "ѕ": "s", "с": "c",
     "І": "I", "О": "O", "Е": "E", "А": "A", "Ѕ": "S", "С": "C"
@@ -66,7 +77,26 @@ config = {
     "temperature": 0.5,
     "top_p": 0.8,
     "top_k": 40,
-    "max_output_tokens": 1024
+    "max_output_tokens": 1024,
+    "response_mime_type": "application/json",
+    "response_schema": {
+      "type": "OBJECT",
+      "properties": {
+        "risk_level": {"type": "STRING", "enum": ["high", "medium", "low"]},
+        "confidence_score": {"type": "NUMBER"},
+        "suspicious_elements": {
+          "type": "OBJECT",
+          "properties": {
+            "urls": {"type": "ARRAY", "items": {"type": "STRING"}},
+            "urgent_phrases": {"type": "ARRAY", "items": {"type": "STRING"}},
+            "credential_phrases": {"type": "ARRAY", "items": {"type": "STRING"}}
+          }
+        },
+        "security_recommendations": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "detailed_analysis": {"type": "STRING"}
+      },
+      "required": ["risk_level", "confidence_score", "suspicious_elements", "security_recommendations", "detailed_analysis"]
+    }
   },
   "gemini_safety_settings": [
     {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
@@ -103,7 +133,8 @@ logging.basicConfig(
 try:
     from fastapi import FastAPI, HTTPException
     from fastapi.middleware.cors import CORSMiddleware
-    from pydantic import BaseModel
+    from fastapi.responses import StreamingResponse
+    from pydantic import BaseModel, ConfigDict, Field, StringConstraints
     import uvicorn
     import google.generativeai as genai
     logging.info("✅ FastAPI and dependencies imported successfully")
@@ -119,6 +150,34 @@ try:
 except ImportError:
     logging.warning("⚠️ python-dotenv not installed. Using environment variables directly.")
 
+# --- Optional Accelerators ---
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+    logging.info("ℹ️ pyahocorasick not installed. Keyword matching falls back to substring checks.")
+
+try:
+    from rapidfuzz.distance import Levenshtein
+except ImportError:
+    Levenshtein = None
+    logging.info("ℹ️ rapidfuzz not installed. Typosquatting checks use the pure-Python edit distance.")
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    from fastapi.responses import JSONResponse as DefaultResponse
+    json_loads = json.loads
+
+    def json_dumps(obj: Any) -> bytes:
+        """Serializes obj to UTF-8 JSON bytes, like orjson.dumps."""
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+    logging.info("ℹ️ orjson not installed. Using the standard json module.")
+
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 if not GEMINI_API_KEY:
     logging.error("❌ CRITICAL: GEMINI_API_KEY not found in environment variables or .env file.")
@@ -127,24 +186,45 @@ else:
     genai.configure(api_key=GEMINI_API_KEY)
     generation_config = config.get("gemini_generation_config", {})
     safety_settings = config.get("gemini_safety_settings", [])
+    # One model instance is shared by all requests instead of being rebuilt per call
+    gemini_model = genai.GenerativeModel(
+        'gemini-1.5-flash',
+        generation_config=generation_config,
+        safety_settings=safety_settings
+    )
     logging.info("✅ Gemini API configured successfully.")
 
 # --- Pydantic Models for Request/Response ---
+# Bounding the payload bounds the worst-case cost of every regex scan over it
+BoundedText = Annotated[str, StringConstraints(max_length=config["max_text_length"])]
+
 class TextAnalysisRequest(BaseModel):
-    text: str
+    text: BoundedText
+
+# Levels produced by the rule-based scoring; Gemini's own level is passed through unvalidated
+RiskLevel = Literal["low", "medium", "high"]
 
 class AnalysisResponse(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
     result: str
     risk_score: float = 0.0
     risk_level: str = "low"
-    suspicious_elements: dict = {}
-    features: dict = {}
+    suspicious_elements: Dict[str, Any] = Field(default_factory=dict)
+    features: Dict[str, Any] = Field(default_factory=dict)
+
+class BatchAnalysisRequest(BaseModel):
+    texts: List[BoundedText] = Field(max_length=config["max_batch_size"])
+
+class BatchAnalysisResponse(BaseModel):
+    risk_levels: List[RiskLevel]
 
 # --- FastAPI App Initialization ---
 app = FastAPI(
     title="Phishing Detector API",
     description="API for detecting phishing indicators in text content",
-    version="3.0.0"
+    version="3.0.0",
+    default_response_class=DefaultResponse
 )
 
 app.add_middleware(
@@ -155,131 +235,452 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Dedicated pool for the CPU-bound rule-based checks so they neither block the event loop
+# nor queue behind other users of the default executor
+APP_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="phishguard-rules")
+
+def run_in_app_executor(func, *args):
+    """Runs func(*args) on APP_EXECUTOR and returns an awaitable for its result."""
+    return asyncio.get_running_loop().run_in_executor(APP_EXECUTOR, func, *args)
+
+# --- Pre-compiled Patterns ---
+# Compiled once at import so the request path calls the pattern objects directly
+# instead of going through the re module's cache on every call.
+# One character class of the RFC 3986 unreserved, reserved and percent characters, so a URL
+# stops at '<', '>', '"', '\', '^' and whitespace instead of running into the surrounding markup.
+_URL_RE = re.compile(r"https?://[A-Za-z0-9\-._~:/?#\[\]@!$&'()*+,;=%]+")
+_CAPS_RE = re.compile(r'[A-Z]{4,}')
+# The closing quote and '<address>' of '"Display Name" <address>'. The display name is found by
+# scanning back from the quote, so no part of the text is rescanned from every quote in it.
+_SENDER_ADDRESS_RE = re.compile(r'(?<!\\)(["\'])\s*<([^<>\n]+)>')
+DISPLAY_NAME_LIMIT = 256
+# All sender patterns in one alternation so the text is walked once instead of once per pattern.
+# The configured pattern only scans from an '@' up to the next one, so each character is visited
+# by a single attempt; '@.*' rescanned the rest of the line from every '@' and went quadratic.
+# '$' only matches at the end of the text, where the last '@' on the line matches if any does.
+_SENDER_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in config['suspicious_sender_patterns']), re.IGNORECASE)
+_SUSPICIOUS_TLDS = frozenset(tld.lstrip('.') for tld in config['suspicious_tlds'])
+
+# Typosquatting means an edit distance of at most this many characters from a legitimate domain
+MAX_TYPO_DISTANCE = 2
+_LEGIT_DOMAINS = frozenset(config['legitimate_domains'])
+# Domains whose lengths differ by more than MAX_TYPO_DISTANCE can never be close enough, so
+# candidates are bucketed by length and only neighbouring buckets are compared
+_LEGIT_BY_LEN = defaultdict(list)
+for _domain in config['legitimate_domains']:
+    _LEGIT_BY_LEN[len(_domain)].append(_domain)
+
+# (domain, brand name) pairs for sender spoofing, e.g. ("paypal.com", "paypal")
+_BRAND_NAMES = tuple((domain, domain.split('.')[0]) for domain in config['legitimate_domains'])
+
+# --- Result Caching ---
+
+class TTLCache:
+    """A small thread-safe LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+def text_digest(text: str) -> bytes:
+    """Returns a compact, collision-resistant cache key for an email body."""
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+_features_cache = TTLCache(maxsize=1024, ttl=60)
+_quick_check_cache = TTLCache(maxsize=1024, ttl=60)
+
 # --- Core Phishing Detection Logic ---
 
-def levenshtein_distance(s1: str, s2: str) -> int:
-    """Calculates the Levenshtein distance between two strings."""
+def bounded_levenshtein(s1: str, s2: str, max_distance: int) -> int:
+    """Calculates the Levenshtein distance between two strings, capped at max_distance + 1.
+
+    Only the diagonal band of width 2 * max_distance + 1 is filled in, and the scan stops as soon
+    as a whole row exceeds the bound. Two row buffers are reused instead of allocating one per row.
+    """
     if len(s1) < len(s2):
-        return levenshtein_distance(s2, s1)
-    if len(s2) == 0:
+        s1, s2 = s2, s1
+    over = max_distance + 1
+    length = len(s2)
+    if len(s1) - length > max_distance:
+        return over
+    if length == 0:
         return len(s1)
-    previous_row = range(len(s2) + 1)
-    for i, c1 in enumerate(s1):
-        current_row = [i + 1]
-        for j, c2 in enumerate(s2):
-            insertions = previous_row[j + 1] + 1
-            deletions = current_row[j] + 1
-            substitutions = previous_row[j] + (c1 != c2)
-            current_row.append(min(insertions, deletions, substitutions))
-        previous_row = current_row
-    return previous_row[-1]
+    previous_row = [min(j, over) for j in range(length + 1)]
+    current_row = [over] * (length + 1)
+    for i, c1 in enumerate(s1, 1):
+        low = max(1, i - max_distance)
+        high = min(length, i + max_distance)
+        # The cells just outside the band may hold values from two rows ago
+        current_row[low - 1] = min(i, over) if low == 1 else over
+        if high < length:
+            current_row[high + 1] = over
+        row_min = current_row[low - 1]
+        for j in range(low, high + 1):
+            distance = min(
+                previous_row[j] + 1,                       # insertion
+                current_row[j - 1] + 1,                    # deletion
+                previous_row[j - 1] + (c1 != s2[j - 1]),   # substitution
+                over,
+            )
+            current_row[j] = distance
+            if distance < row_min:
+                row_min = distance
+        if row_min == over:
+            return over
+        previous_row, current_row = current_row, previous_row
+    return previous_row[length]
+
+def typo_distance(s1: str, s2: str) -> int:
+    """Edit distance between two domains, exact up to MAX_TYPO_DISTANCE (larger distances are capped)."""
+    if Levenshtein is not None:
+        # score_cutoff lets rapidfuzz stop early and return MAX_TYPO_DISTANCE + 1 for distant pairs
+        return Levenshtein.distance(s1, s2, score_cutoff=MAX_TYPO_DISTANCE)
+    return bounded_levenshtein(s1, s2, MAX_TYPO_DISTANCE)
+
+def extract_host(url: str) -> str:
+    """Returns the lowercased host of an http(s) URL without building a full parse result.
+
+    User info ("paypal.com@evil.tk") and the port are dropped.
+    """
+    netloc = url.partition('://')[2]
+    for separator in '/?#':
+        netloc = netloc.partition(separator)[0]
+    if '[' in netloc or ']' in netloc:
+        # Rare IPv6 literal: let urlsplit validate it (raising ValueError when malformed)
+        return urlsplit(url).hostname or ''
+    return netloc.rpartition('@')[2].partition(':')[0].lower()
+
+def is_typosquat(domain: str) -> bool:
+    """Checks if a domain is within MAX_TYPO_DISTANCE edits of a legitimate domain."""
+    length = len(domain)
+    for candidate_length in range(length - MAX_TYPO_DISTANCE, length + MAX_TYPO_DISTANCE + 1):
+        for legitimate_domain in _LEGIT_BY_LEN.get(candidate_length, ()):
+            if 0 < typo_distance(domain, legitimate_domain) <= MAX_TYPO_DISTANCE:
+                return True
+    return False
+
+def is_ipv4(domain: str) -> bool:
+    """Checks if a hostname is a dotted-quad IPv4 address."""
+    parts = domain.split('.')
+    if len(parts) != 4:
+        return False
+    return all(part.isascii() and part.isdigit() and len(part) <= 3 and int(part) <= 255 for part in parts)
 
 def has_homoglyphs(text: str, homoglyph_map: Dict[str, str]) -> bool:
     """Checks if a string contains characters that look like but are not standard Latin letters."""
-    for char in text:
-        if char in homoglyph_map:
-            return True
-    return False
+    # isdisjoint walks the text in C and stops at the first homoglyph
+    return not homoglyph_map.keys().isdisjoint(text)
 
-def extract_features(text: str) -> Dict[str, bool]:
-    """Extracts various features from the input text that can indicate phishing attempts."""
-    features = {
-        'has_urgency': False,
-        'has_suspicious_links': False,
-        'has_credential_request': False,
-        'has_suspicious_sender': False,
-        'has_poor_formatting': False,
-        'has_typosquatting': False,
-        'has_sender_spoofing': False, # New
-        'has_homoglyph_chars': False, # New
-    }
-    
-    text_lower = text.lower()
-    urls = re.findall(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', text)
-    
-    # 1. Check for urgency keywords
-    features['has_urgency'] = any(word in text_lower for word in config['urgency_words'])
+# Feature names in reporting order; feature i is stored as bit (1 << i) of a flags int
+FEATURE_NAMES = (
+    'has_urgency',
+    'has_suspicious_links',
+    'has_credential_request',
+    'has_suspicious_sender',
+    'has_poor_formatting',
+    'has_typosquatting',
+    'has_sender_spoofing',
+    'has_homoglyph_chars',
+)
+F_URGENCY = 1 << 0
+F_SUSPICIOUS_LINKS = 1 << 1
+F_CREDENTIAL_REQUEST = 1 << 2
+F_SUSPICIOUS_SENDER = 1 << 3
+F_POOR_FORMATTING = 1 << 4
+F_TYPOSQUATTING = 1 << 5
+F_SENDER_SPOOFING = 1 << 6
+F_HOMOGLYPH_CHARS = 1 << 7
 
-    # 2. Check for credential request keywords
-    features['has_credential_request'] = any(word in text_lower for word in config['credential_words'])
+# Keyword groups matched together in one pass over the text, with the flag each group sets
+KEYWORD_GROUPS = (
+    (F_URGENCY, config['urgency_words']),
+    (F_CREDENTIAL_REQUEST, config['credential_words']),
+)
+KEYWORD_FEATURES = F_URGENCY | F_CREDENTIAL_REQUEST
+
+def _keyword_flags() -> Dict[str, int]:
+    """Maps each lowercase keyword to the flags of the groups it belongs to."""
+    keyword_flags = {}
+    for flag, words in KEYWORD_GROUPS:
+        for word in words:
+            keyword_flags[word.lower()] = keyword_flags.get(word.lower(), 0) | flag
+    return keyword_flags
 
-    # 3. Analyze URLs
-    for url in urls:
+_KEYWORD_FLAGS = _keyword_flags()
+
+if ahocorasick is not None:
+    _KEYWORD_AC = ahocorasick.Automaton()
+    for _word, _flags in _KEYWORD_FLAGS.items():
+        _KEYWORD_AC.add_word(_word, _flags)
+    _KEYWORD_AC.make_automaton()
+else:
+    _KEYWORD_AC = None
+
+def check_keywords(text: str) -> int:
+    """Flags urgency and credential request keywords."""
+    flags = 0
+    # One lowercase pass is far cheaper than case-insensitive matching at every position
+    lowered = text.lower()
+    if _KEYWORD_AC is not None:
+        # The automaton finds every keyword in a single pass over the text
+        matches = (word_flags for _, word_flags in _KEYWORD_AC.iter(lowered))
+    else:
+        # Substring checks run at C speed and beat a regex alternation tried at every position
+        matches = (word_flags for word, word_flags in _KEYWORD_FLAGS.items() if word in lowered)
+    for word_flags in matches:
+        flags |= word_flags
+        if flags == KEYWORD_FEATURES:
+            break
+    return flags
+
+LINK_FEATURES = F_SUSPICIOUS_LINKS | F_TYPOSQUATTING | F_HOMOGLYPH_CHARS
+
+def check_host(domain: str) -> int:
+    """Flags a single link host."""
+    flags = 0
+    # Check for homoglyphs in the domain
+    if has_homoglyphs(domain, config['homoglyphs']):
+        flags |= F_HOMOGLYPH_CHARS | F_SUSPICIOUS_LINKS
+
+    # Check for suspicious TLDs
+    _, dot, tld = domain.rpartition('.')
+    if dot and tld in _SUSPICIOUS_TLDS:
+        flags |= F_SUSPICIOUS_LINKS
+
+    # Check for IP addresses in the hostname
+    if is_ipv4(domain):
+        flags |= F_SUSPICIOUS_LINKS
+
+    # Check for typosquatting
+    clean_domain = domain.replace('www.', '')
+    if clean_domain not in _LEGIT_DOMAINS and is_typosquat(clean_domain):
+        flags |= F_TYPOSQUATTING | F_SUSPICIOUS_LINKS
+    return flags
+
+# The same domains recur across emails, so host results are memoized. DNS names are at most
+# 253 characters; longer hosts are checked uncached so the cache stays small.
+MAX_CACHED_HOST_LENGTH = 253
+_cached_check_host = lru_cache(maxsize=4096)(check_host)
+
+def check_links(text: str) -> int:
+    """Flags suspicious TLDs, raw IP hosts, homoglyphs and typosquatting in linked domains."""
+    flags = 0
+    # Emails often repeat the same link, so each distinct URL is analyzed once (in order)
+    for url in dict.fromkeys(_URL_RE.findall(text)):
+        if flags == LINK_FEATURES:
+            break  # Further URLs cannot add anything
         try:
-            parsed = urlparse(url)
-            domain = parsed.netloc.lower().split(':')[0]
-            
-            # Check for homoglyphs in the domain
-            if has_homoglyphs(domain, config['homoglyphs']):
-                features['has_homoglyph_chars'] = True
-                features['has_suspicious_links'] = True
-
-            # Check for suspicious TLDs
-            if any(domain.endswith(tld) for tld in config['suspicious_tlds']):
-                features['has_suspicious_links'] = True
-
-            # Check for IP addresses in the hostname
-            if re.match(r"^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$", domain):
-                features['has_suspicious_links'] = True
-
-            # Check for typosquatting
-            clean_domain = domain.replace('www.', '')
-            for legitimate_domain in config['legitimate_domains']:
-                distance = levenshtein_distance(clean_domain, legitimate_domain)
-                if 0 < distance <= 2 and clean_domain != legitimate_domain:
-                    features['has_typosquatting'] = True
-                    features['has_suspicious_links'] = True
-                    break
+            domain = extract_host(url)
+            if len(domain) <= MAX_CACHED_HOST_LENGTH:
+                flags |= _cached_check_host(domain)
+            else:
+                flags |= check_host(domain)
         except Exception as e:
             logging.warning(f"Could not parse URL '{url}': {e}")
-            features['has_suspicious_links'] = True
-
-    # 4. Check for suspicious sender patterns
-    features['has_suspicious_sender'] = any(re.search(pattern, text_lower) for pattern in config['suspicious_sender_patterns'])
-
-    # 5. Check for sender display name spoofing
-    # Looks for "Legit Name" <scammer@email.com> where "Legit Name" is a known brand
-    sender_patterns = re.findall(r'["\'](.+?)["\']\s*<(.+?)>', text)
-    for display_name, email_address in sender_patterns:
-        for brand in config['legitimate_domains']:
-            brand_name = brand.split('.')[0]
-            if brand_name in display_name.lower() and brand not in email_address.lower():
-                features['has_sender_spoofing'] = True
-                break
-        if features['has_sender_spoofing']:
-            break
+            flags |= F_SUSPICIOUS_LINKS
+    return flags
+
+def check_suspicious_sender(text: str) -> int:
+    """Flags sender addresses matching the configured suspicious patterns."""
+    return F_SUSPICIOUS_SENDER if _SENDER_RE.search(text) else 0
 
-    # 6. Check for poor formatting indicators
-    features['has_poor_formatting'] = (
+def find_display_senders(text: str) -> Iterator[Tuple[str, str]]:
+    """Yields the display name and address of every '"Display Name" <address>' sender in the text."""
+    search_from = 0
+    for match in _SENDER_ADDRESS_RE.finditer(text):
+        closing = match.start()
+        # The name opens at the first matching quote on the same line, within DISPLAY_NAME_LIMIT
+        # characters and after the previous sender, so "PayPal's Team" keeps its apostrophe
+        start = max(search_from, closing - DISPLAY_NAME_LIMIT - 1)
+        start = max(start, text.rfind('\n', start, closing) + 1)
+        # The end is clamped because find() would read -1 as the last character of the text
+        opening = text.find(match.group(1), start, max(closing - 1, 0))
+        if opening != -1:
+            yield text[opening + 1:closing], match.group(2)
+            search_from = match.end()
+
+def check_sender_spoofing(text: str) -> int:
+    """Flags "Legit Name" <scammer@email.com> senders where "Legit Name" is a known brand."""
+    for display_name, email_address in find_display_senders(text):
+        display_name = display_name.lower()
+        email_address = email_address.lower()
+        for brand, brand_name in _BRAND_NAMES:
+            if brand_name in display_name and brand not in email_address:
+                return F_SENDER_SPOOFING
+    return 0
+
+def check_poor_formatting(text: str) -> int:
+    """Flags excessive punctuation, currency symbols and shouting."""
+    has_poor_formatting = (
         text.count('!') > 3 or
         text.count('$') > 2 or
-        len(re.findall(r'[A-Z]{4,}', text)) > 2
+        # Stop at the third all-caps run instead of collecting every run into a list
+        next(islice(_CAPS_RE.finditer(text), 2, None), None) is not None
     )
-    
-    return features
+    return F_POOR_FORMATTING if has_poor_formatting else 0
 
+# Feature checks paired with the flags they can set, ordered by the most weight they can
+# contribute so that quick_risk_level() can stop as soon as the risk level is settled.
+FEATURE_CHECKS = (
+    (check_links, LINK_FEATURES),
+    (check_keywords, KEYWORD_FEATURES),
+    (check_sender_spoofing, F_SENDER_SPOOFING),
+    (check_suspicious_sender, F_SUSPICIOUS_SENDER),
+    (check_poor_formatting, F_POOR_FORMATTING),
+)
+ALL_FEATURES = (1 << len(FEATURE_NAMES)) - 1
+
+def extract_flags(text: str) -> int:
+    """Runs every feature check and returns the detected features as a bitmask."""
+    flags = 0
+    for check, _ in FEATURE_CHECKS:
+        flags |= check(text)
+    return flags
+
+def flags_to_features(flags: int) -> Dict[str, bool]:
+    """Expands a feature bitmask into the feature dict reported by the API."""
+    return {name: bool(flags & (1 << i)) for i, name in enumerate(FEATURE_NAMES)}
+
+def extract_features(text: str) -> Dict[str, bool]:
+    """Extracts various features from the input text that can indicate phishing attempts."""
+    return flags_to_features(extract_flags(text))
+
+_FEATURE_WEIGHTS = tuple(config['feature_weights'].get(name, 0) for name in FEATURE_NAMES)
+# There are only 2**len(FEATURE_NAMES) feature combinations, so every score is computed up front
+_SCORE_TABLE = tuple(
+    min(sum(weight for i, weight in enumerate(_FEATURE_WEIGHTS) if flags & (1 << i)), 1.0) # Cap score at 1.0
+    for flags in range(ALL_FEATURES + 1)
+)
+
+def calculate_risk_score(flags: int) -> float:
+    """Returns the sum of the configured weights of the features in the bitmask, capped at 1.0."""
+    return _SCORE_TABLE[flags]
+
+# Minimum score for each risk level, highest first
+RISK_THRESHOLDS = ((0.7, "high"), (0.4, "medium"))
+
+def get_risk_level(risk_score: float) -> str:
+    """Maps a risk score onto the high/medium/low risk levels."""
+    for threshold, risk_level in RISK_THRESHOLDS:
+        if risk_score >= threshold:
+            return risk_level
+    return "low"
+
+RISK_SUMMARIES = {
+    "high": "🚨 High likelihood of phishing! Exercise extreme caution.",
+    "medium": "⚠️ Some suspicious elements detected. Review carefully.",
+    "low": "✅ Low risk - few or no suspicious elements detected.",
+}
+
+def quick_risk_level(text: str) -> str:
+    """Returns the rule-based risk level, skipping the remaining checks once they cannot change it."""
+    flags = 0
+    pending = ALL_FEATURES
+    for check, mask in FEATURE_CHECKS:
+        flags |= check(text)
+        pending &= ~mask
+        lowest = get_risk_level(calculate_risk_score(flags))
+        if lowest == get_risk_level(calculate_risk_score(flags | pending)):
+            return lowest
+    return get_risk_level(calculate_risk_score(flags))
+
+def get_flags(text: str) -> int:
+    """Returns extract_flags(text), reusing a recent result when the same text was just analyzed."""
+    key = text_digest(text)
+    flags = _features_cache.get(key)
+    if flags is None:
+        flags = extract_flags(text)
+        _features_cache.set(key, flags)
+    return flags
+
+def get_features(text: str) -> Dict[str, bool]:
+    """Returns extract_features(text), reusing a recent result when the same text was just analyzed."""
+    return flags_to_features(get_flags(text))
+
+
+# Only the start of an email is sent to Gemini
+GEMINI_TEXT_LIMIT = 3000
+_gemini_cache = TTLCache(maxsize=10000, ttl=3600)
+# Gemini calls currently in flight, keyed like _gemini_cache
+_gemini_inflight: Dict[bytes, asyncio.Task] = {}
 
 async def analyze_with_gemini(text: str) -> Dict[str, Any]:
-    """Enhanced Gmail phishing analysis using Gemini AI with all safety filters disabled."""
+    """Returns the Gemini analysis for the text, reusing the result for an identical email."""
+    cache_key = text_digest(text[:GEMINI_TEXT_LIMIT])
+    cached_analysis = _gemini_cache.get(cache_key)
+    if cached_analysis is not None:
+        logging.info("Using cached Gemini analysis for previously seen content")
+        return cached_analysis
+
+    # Concurrent requests for the same email share a single Gemini call
+    pending = _gemini_inflight.get(cache_key)
+    if pending is None:
+        pending = asyncio.create_task(fetch_gemini_analysis(text, cache_key))
+        _gemini_inflight[cache_key] = pending
+        pending.add_done_callback(lambda _: _gemini_inflight.pop(cache_key, None))
+    else:
+        logging.info("Joining in-flight Gemini analysis for identical content")
+    # Shielded so one caller giving up does not cancel the call for the others
+    return await asyncio.shield(pending)
+
+async def fetch_gemini_analysis(text: str, cache_key: bytes) -> Dict[str, Any]:
+    """Requests a fresh Gemini analysis and caches it under cache_key."""
+    analysis, cacheable = await request_gemini_analysis(text)
+    # Fallback responses are not cached so the next request retries the API
+    if cacheable:
+        _gemini_cache.set(cache_key, analysis)
+    return analysis
+
+async def analyze_with_gemini_within(text: str, timeout: float) -> Optional[Dict[str, Any]]:
+    """Returns the Gemini analysis, or None if it takes longer than `timeout` seconds.
+
+    A call that times out keeps running in the background so its result is cached for the next request.
+    """
+    try:
+        # The in-flight call is shielded and held in _gemini_inflight, so timing out only stops waiting
+        return await asyncio.wait_for(analyze_with_gemini(text), timeout=timeout)
+    except asyncio.TimeoutError:
+        logging.warning(f"⚠️ Gemini analysis exceeded {timeout}s, finishing it in the background.")
+        return None
+
+async def request_gemini_analysis(text: str) -> Tuple[Dict[str, Any], bool]:
+    """Enhanced Gmail phishing analysis using Gemini AI with all safety filters disabled.
+
+    Returns the analysis and whether it is a validated Gemini result that may be cached.
+    """
     error_response = config["gemini_error_response"]
     
     # Preprocess the text to focus on key elements
-    text_preview = text[:3000]  # Limit to first 3000 chars for better processing
+    text_preview = text[:GEMINI_TEXT_LIMIT]  # Limit to first 3000 chars for better processing
     
     try:
-        # Create model with completely disabled safety filters
-        model = genai.GenerativeModel(
-            'gemini-1.5-flash',
-            generation_config=generation_config,
-            safety_settings=safety_settings
-        )
-        
         prompt = config["gemini_prompt_template"].format(text=text_preview)
         logging.info(f"Sending Gmail content to Gemini API for phishing analysis (length: {len(text_preview)} chars)")
         logging.info(f"Safety settings applied: {safety_settings}")
         
         # Generate content with explicit safety override
-        response = await model.generate_content_async(
+        response = await gemini_model.generate_content_async(
             prompt,
             safety_settings=safety_settings  # Explicitly pass safety settings
         )
@@ -300,7 +701,7 @@ async def analyze_with_gemini(text: str) -> Dict[str, Any]:
         if not response.candidates:
             logging.warning("No response candidates returned - this may be normal for phishing content")
             # Return high-risk assessment when blocked
-            return {
+            return ({
                 "risk_level": "high",
                 "confidence_score": 0.9,
                 "detailed_analysis": "Content was flagged by AI safety systems, which often indicates high-risk phishing content.",
@@ -317,7 +718,7 @@ async def analyze_with_gemini(text: str) -> Dict[str, Any]:
                     "Mark as spam and delete",
                     "Report to your IT security team"
                 ]
-            }
+            }, False)
         
         # Get the first candidate response
         candidate = response.candidates[0]
@@ -329,7 +730,7 @@ async def analyze_with_gemini(text: str) -> Dict[str, Any]:
             
             if finish_reason in ['SAFETY', 'RECITATION']:
                 logging.info(f"Response blocked due to {finish_reason} - treating as high-risk")
-                return {
+                return ({
                     "risk_level": "high",
                     "confidence_score": 0.95,
                     "detailed_analysis": f"AI analysis was blocked due to {finish_reason.lower()} concerns. This typically indicates the content contains elements commonly found in phishing or malicious emails.",
@@ -346,7 +747,7 @@ async def analyze_with_gemini(text: str) -> Dict[str, Any]:
                         "Delete this email immediately",
                         "Report to security team if from internal sender"
                     ]
-                }
+                }, False)
         
         # Try to extract the response text
         try:
@@ -354,14 +755,14 @@ async def analyze_with_gemini(text: str) -> Dict[str, Any]:
             if not response_text or response_text.strip() == "":
                 logging.warning("Gemini returned empty response")
                 # Fallback to rule-based analysis
-                return error_response
+                return error_response, False
             
             logging.info(f"Raw Gemini response length: {len(response_text)} chars")
             logging.debug(f"Response preview: {response_text[:300]}...")
                 
             # Try to parse as JSON
             try:
-                # Clean the response text - remove markdown code blocks if present
+                # JSON mode should return bare JSON; still strip markdown fences in case it does not
                 clean_response = response_text.strip()
                 if clean_response.startswith('```json'):
                     clean_response = clean_response[7:]  # Remove ```json
@@ -371,17 +772,17 @@ async def analyze_with_gemini(text: str) -> Dict[str, Any]:
                     clean_response = clean_response[:-3]  # Remove trailing ```
                 clean_response = clean_response.strip()
                 
-                result = json.loads(clean_response)
+                result = json_loads(clean_response)
                 
                 # Validate required fields
                 required_fields = ["risk_level", "confidence_score", "detailed_analysis"]
                 if all(field in result for field in required_fields):
                     logging.info("✅ Successfully parsed Gemini AI phishing analysis")
-                    return result
+                    return result, True
                 else:
                     logging.warning(f"Response missing required fields. Got: {list(result.keys())}")
                     
-            except json.JSONDecodeError as je:
+            except json.JSONDecodeError as je:  # orjson.JSONDecodeError subclasses this
                 logging.warning(f"JSON parsing failed: {str(je)}")
                 logging.debug(f"Clean response attempt: {clean_response[:500] if 'clean_response' in locals() else 'N/A'}")
                 
@@ -402,7 +803,7 @@ async def analyze_with_gemini(text: str) -> Dict[str, Any]:
                     risk_level = "low"
                     confidence = 0.4
                 
-                return {
+                return ({
                     "risk_level": risk_level,
                     "confidence_score": confidence,
                     "detailed_analysis": f"AI analysis (parsed from text): {response_text[:1000]}...",
@@ -418,19 +819,94 @@ async def analyze_with_gemini(text: str) -> Dict[str, Any]:
                         "When in doubt, treat as suspicious",
                         "Do not click links until verified"
                     ]
-                }
+                }, False)
                 
         except ValueError as ve:
             logging.warning(f"Error accessing Gemini response text: {str(ve)}")
-            return error_response
+            return error_response, False
         
     except Exception as e:
         logging.error(f"Unexpected error in Gemini analysis: {str(e)}", exc_info=True)
-        error_response["detailed_analysis"] = f"System error during AI analysis: {str(e)}"
-        return error_response
+        # Copy rather than mutate the shared config entry, which other requests also return
+        return {**error_response, "detailed_analysis": f"System error during AI analysis: {str(e)}"}, False
     
     # Fallback return
-    return error_response
+    return error_response, False
+
+# --- Report Formatting ---
+
+def build_ai_report(ai_analysis: Dict[str, Any]) -> str:
+    """Formats the Gemini analysis as the human-readable report shown by the extension."""
+    ai_elements = ai_analysis.get('suspicious_elements', {})
+    report = [f"🛡️ {ai_analysis.get('risk_level', 'unknown').upper()} RISK 🛡️\n"]
+    report.append("🤖 AI Analysis:")
+    report.append(ai_analysis.get('detailed_analysis', 'No detailed analysis available.'))
+    
+    # Add technical findings from AI
+    report.append("\n📋 AI Technical Findings:")
+    if ai_elements.get('urls'):
+        report.append(f"• Suspicious URLs detected: {len(ai_elements['urls'])}")
+        for url in ai_elements['urls'][:3]:  # Show first 3 URLs
+            report.append(f"  - {url}")
+    if ai_elements.get('urgent_phrases'):
+        report.append(f"• Urgent language patterns: {len(ai_elements['urgent_phrases'])}")
+        for phrase in ai_elements['urgent_phrases'][:3]:  # Show first 3 phrases
+            report.append(f"  - \"{phrase}\"")
+    if ai_elements.get('credential_phrases'):
+        report.append(f"• Credential requests: {len(ai_elements['credential_phrases'])}")
+        for phrase in ai_elements['credential_phrases'][:3]:  # Show first 3 phrases
+            report.append(f"  - \"{phrase}\"")
+    
+    if ai_analysis.get('security_recommendations'):
+        report.append("\n✅ Security Recommendations:")
+        for rec in ai_analysis['security_recommendations']:
+            report.append(f"• {rec}")
+    return "\n".join(report)
+
+# "has_sender_spoofing" -> "Has Sender Spoofing", formatted once instead of on every report
+FEATURE_LABELS = {name: name.replace('_', ' ').title() for name in FEATURE_NAMES}
+
+def build_quick_report(summary: str, features: Dict[str, bool]) -> str:
+    """Formats the rule-based summary and detected features as a report."""
+    report = [summary, "\n📋 Technical Findings:"]
+    findings = [key for key, value in features.items() if value]
+    if findings:
+        report.extend([f"• Detected: {FEATURE_LABELS[finding]}" for finding in findings])
+    else:
+        report.append("• No suspicious technical elements detected.")
+    return "\n".join(report)
+
+def build_ai_response(ai_analysis: Dict[str, Any], rule_based_features: Dict[str, Any], verbose: bool) -> AnalysisResponse:
+    """Combines the Gemini analysis with the rule-based features into an AnalysisResponse."""
+    # Extract AI features from suspicious_elements
+    ai_elements = ai_analysis.get('suspicious_elements', {})
+    ai_features = {
+        'has_urgency': bool(ai_elements.get('urgent_phrases', [])),
+        'has_suspicious_links': bool(ai_elements.get('urls', [])),
+        'has_credential_request': bool(ai_elements.get('credential_phrases', [])),
+        'has_ai_analysis': True,  # Flag to indicate AI was used
+        'ai_confidence': ai_analysis.get('confidence_score', 0.0),
+        'ai_risk_assessment': ai_analysis.get('risk_level', 'unknown'),
+        'ai_detected_urls': len(ai_elements.get('urls', [])),
+        'ai_detected_urgent_phrases': len(ai_elements.get('urgent_phrases', [])),
+        'ai_detected_credential_phrases': len(ai_elements.get('credential_phrases', []))
+    }
+    
+    # Merge with rule-based features for comprehensive analysis
+    combined_features = {**rule_based_features, **ai_features}
+
+    if verbose:
+        result = build_ai_report(ai_analysis)
+    else:
+        result = f"🛡️ {ai_analysis.get('risk_level', 'unknown').upper()} RISK 🛡️"
+    
+    return AnalysisResponse(
+        result=result,
+        risk_score=ai_analysis.get('confidence_score', 0.0),
+        risk_level=ai_analysis.get('risk_level', 'low'),
+        suspicious_elements=ai_analysis.get('suspicious_elements', {}),
+        features=combined_features  # Now uses AI + rule-based features
+    )
 
 # --- API Endpoints ---
 
@@ -443,127 +919,148 @@ async def root():
         "endpoints": {
             "analyze_text": "POST /analyze_text - Comprehensive phishing analysis",
             "quick_check": "POST /quick_check - Quick rule-based phishing assessment",
+            "analyze_batch": "POST /analyze_batch - Rule-based risk levels for many texts in one call",
+            "analyze_text_stream": "POST /analyze_text_stream - Quick verdict first, then the AI analysis (NDJSON)",
         }
     }
 
 @app.post("/analyze_text", response_model=AnalysisResponse)
-async def analyze_text_endpoint(request: TextAnalysisRequest):
-    """Performs comprehensive AI-powered phishing analysis using Gemini."""
+async def analyze_text_endpoint(request: TextAnalysisRequest, verbose: bool = True):
+    """Performs comprehensive AI-powered phishing analysis using Gemini.
+
+    Pass `verbose=false` to skip building the human-readable report.
+    """
     try:
-        ai_analysis = await analyze_with_gemini(request.text)
-        rule_based_features = extract_features(request.text)  # Keep as backup
+        # Run the rule-based scan in a worker thread while the Gemini request is in flight
+        ai_analysis, rule_based_features = await asyncio.gather(
+            analyze_with_gemini_within(request.text, config["gemini_timeout_seconds"]),
+            run_in_app_executor(get_features, request.text),  # Keep as backup
+            return_exceptions=True,
+        )
+        # A failure in one half should not discard the other half's result
+        if isinstance(ai_analysis, Exception):
+            logging.error(f"Gemini analysis raised: {ai_analysis}", exc_info=ai_analysis)
+            ai_analysis = config["gemini_error_response"]
+        if isinstance(rule_based_features, Exception):
+            logging.error(f"Rule-based analysis raised: {rule_based_features}", exc_info=rule_based_features)
+            rule_based_features = {}
         
+        # A timed-out AI call should not hold up the verdict the rule-based checks can give
+        if ai_analysis is None:
+            return await quick_check_endpoint(request, verbose)
+
         # Fallback to rule-based analysis if AI fails unexpectedly
         if ai_analysis.get('risk_level') == 'unknown':
             logging.warning("AI analysis returned 'unknown' risk, falling back to quick_check.")
-            return await quick_check_endpoint(request)
-
-        # Extract AI features from suspicious_elements
-        ai_elements = ai_analysis.get('suspicious_elements', {})
-        ai_features = {
-            'has_urgency': bool(ai_elements.get('urgent_phrases', [])),
-            'has_suspicious_links': bool(ai_elements.get('urls', [])),
-            'has_credential_request': bool(ai_elements.get('credential_phrases', [])),
-            'has_ai_analysis': True,  # Flag to indicate AI was used
-            'ai_confidence': ai_analysis.get('confidence_score', 0.0),
-            'ai_risk_assessment': ai_analysis.get('risk_level', 'unknown'),
-            'ai_detected_urls': len(ai_elements.get('urls', [])),
-            'ai_detected_urgent_phrases': len(ai_elements.get('urgent_phrases', [])),
-            'ai_detected_credential_phrases': len(ai_elements.get('credential_phrases', []))
-        }
-        
-        # Merge with rule-based features for comprehensive analysis
-        combined_features = {**rule_based_features, **ai_features}
+            return await quick_check_endpoint(request, verbose)
 
-        # Build a report from the AI analysis
-        report = [f"🛡️ {ai_analysis.get('risk_level', 'unknown').upper()} RISK 🛡️\n"]
-        report.append("🤖 AI Analysis:")
-        report.append(ai_analysis.get('detailed_analysis', 'No detailed analysis available.'))
-        
-        # Add technical findings from AI
-        report.append("\n📋 AI Technical Findings:")
-        if ai_elements.get('urls'):
-            report.append(f"• Suspicious URLs detected: {len(ai_elements['urls'])}")
-            for url in ai_elements['urls'][:3]:  # Show first 3 URLs
-                report.append(f"  - {url}")
-        if ai_elements.get('urgent_phrases'):
-            report.append(f"• Urgent language patterns: {len(ai_elements['urgent_phrases'])}")
-            for phrase in ai_elements['urgent_phrases'][:3]:  # Show first 3 phrases
-                report.append(f"  - \"{phrase}\"")
-        if ai_elements.get('credential_phrases'):
-            report.append(f"• Credential requests: {len(ai_elements['credential_phrases'])}")
-            for phrase in ai_elements['credential_phrases'][:3]:  # Show first 3 phrases
-                report.append(f"  - \"{phrase}\"")
-        
-        if ai_analysis.get('security_recommendations'):
-            report.append("\n✅ Security Recommendations:")
-            for rec in ai_analysis['security_recommendations']:
-                report.append(f"• {rec}")
-        
-        return AnalysisResponse(
-            result="\n".join(report),
-            risk_score=ai_analysis.get('confidence_score', 0.0),
-            risk_level=ai_analysis.get('risk_level', 'low'),
-            suspicious_elements=ai_analysis.get('suspicious_elements', {}),
-            features=combined_features  # Now uses AI + rule-based features
-        )
+        return build_ai_response(ai_analysis, rule_based_features, verbose)
     except Exception as e:
         logging.error(f"Full analysis failed: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 @app.post("/quick_check", response_model=AnalysisResponse)
-async def quick_check_endpoint(request: TextAnalysisRequest):
-    """Provides a quick, rule-based assessment of phishing likelihood."""
+async def quick_check_endpoint(request: TextAnalysisRequest, verbose: bool = True):
+    """Provides a quick, rule-based assessment of phishing likelihood.
+
+    Pass `verbose=false` to return only the summary line instead of the full report.
+    """
     try:
-        features = extract_features(request.text)
-        feature_weights = config['feature_weights']
-        
-        # Calculate score
-        risk_score = sum(feature_weights.get(feature, 0) for feature, present in features.items() if present)
-        risk_score = min(risk_score, 1.0) # Cap score at 1.0
-
-        # Determine risk level
-        if risk_score >= 0.7:
-            risk_level = "high"
-            summary = "🚨 High likelihood of phishing! Exercise extreme caution."
-        elif risk_score >= 0.4:
-            risk_level = "medium"
-            summary = "⚠️ Some suspicious elements detected. Review carefully."
-        else:
-            risk_level = "low"
-            summary = "✅ Low risk - few or no suspicious elements detected."
-
-        # Build report
-        report = [summary, "\n📋 Technical Findings:"]
-        findings = [key for key, value in features.items() if value]
-        if findings:
-            report.extend([f"• Detected: {finding.replace('_', ' ').title()}" for finding in findings])
-        else:
-            report.append("• No suspicious technical elements detected.")
+        cache_key = (text_digest(request.text), verbose)
+        cached_response = _quick_check_cache.get(cache_key)
+        if cached_response is not None:
+            return cached_response
+
+        flags = await run_in_app_executor(get_flags, request.text)
+        features = flags_to_features(flags)
+        risk_score = calculate_risk_score(flags)
+        risk_level = get_risk_level(risk_score)
+        summary = RISK_SUMMARIES[risk_level]
         
-        return AnalysisResponse(
-            result="\n".join(report),
+        response = AnalysisResponse(
+            result=build_quick_report(summary, features) if verbose else summary,
             risk_score=risk_score,
             risk_level=risk_level,
             features=features
         )
+        _quick_check_cache.set(cache_key, response)
+        return response
     except Exception as e:
         logging.error(f"Quick check failed: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Quick check failed: {str(e)}")
 
+@app.post("/analyze_text_stream")
+async def analyze_text_stream_endpoint(request: TextAnalysisRequest, verbose: bool = True):
+    """Streams the rule-based verdict as soon as it is ready, followed by the AI analysis.
+
+    The first line is the rule-based AnalysisResponse and the second is the AI AnalysisResponse,
+    or {"ai_unavailable": true} when Gemini times out or cannot classify the text.
+    """
+    async def generate():
+        # Start the Gemini request before the rule-based check so both run concurrently
+        ai_task = asyncio.create_task(analyze_with_gemini_within(request.text, config["gemini_timeout_seconds"]))
+        try:
+            rule_based_features = {}
+            try:
+                quick_response = await quick_check_endpoint(request, verbose)
+                rule_based_features = quick_response.features
+                yield json_dumps(quick_response.model_dump()) + b"\n"
+            except HTTPException as e:
+                yield json_dumps({"error": e.detail}) + b"\n"
+
+            try:
+                ai_analysis = await ai_task
+            except Exception as e:
+                logging.error(f"Gemini analysis raised: {e}", exc_info=True)
+                yield json_dumps({"error": f"AI analysis failed: {str(e)}"}) + b"\n"
+                return
+
+            # Unlike /analyze_text, do not repeat the rule-based verdict already sent above
+            if ai_analysis is None or ai_analysis.get('risk_level') == 'unknown':
+                yield json_dumps({"ai_unavailable": True}) + b"\n"
+            else:
+                yield json_dumps(build_ai_response(ai_analysis, rule_based_features, verbose).model_dump()) + b"\n"
+        finally:
+            # The client may disconnect before the AI analysis completes
+            if not ai_task.done():
+                ai_task.cancel()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@app.post("/analyze_batch", response_model=BatchAnalysisResponse)
+async def analyze_batch_endpoint(request: BatchAnalysisRequest):
+    """Classifies many texts with the rule-based checks in a single request."""
+    try:
+        # One worker thread handles the whole batch to amortize the dispatch overhead
+        risk_levels = await run_in_app_executor(lambda: [quick_risk_level(text) for text in request.texts])
+        return BatchAnalysisResponse(risk_levels=risk_levels)
+    except Exception as e:
+        logging.error(f"Batch analysis failed: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
+
 # --- Server Execution ---
 if __name__ == "__main__":
     SERVER_PORT = 8000
     module_name = os.path.basename(__file__).replace(".py", "")
+    # Auto-reload is for development only and cannot be combined with multiple workers
+    reload_enabled = os.getenv('PHISHGUARD_RELOAD', '').lower() in ('1', 'true', 'yes')
+    # One worker by default: the caches and the in-flight Gemini table are per process
+    server_workers = 1 if reload_enabled else int(os.getenv('PHISHGUARD_WORKERS', 1))
+    # Per-request access lines are off by default; they cost a format and a write on every request
+    access_log_enabled = os.getenv('PHISHGUARD_ACCESS_LOG', '').lower() in ('1', 'true', 'yes')
 
-    logging.info(f"🚀 Starting Phishing Detection API server on http://localhost:{SERVER_PORT}...")
+    logging.info(f"🚀 Starting Phishing Detection API server on http://localhost:{SERVER_PORT} with {server_workers} worker(s)...")
     
     try:
         uvicorn.run(
             f"{module_name}:app",
             host="0.0.0.0",
             port=SERVER_PORT,
-            reload=True,
+            reload=reload_enabled,
+            workers=server_workers,
+            loop="auto",  # Uses uvloop when installed (pip install "uvicorn[standard]")
+            http="auto",  # Uses httptools when installed
+            access_log=access_log_enabled,
             log_config=None # Disable uvicorn's default loggers to use our custom one
         )
     except KeyboardInterrupt:
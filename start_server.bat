@@ -25,5 +25,8 @@ set "logfile=logs\server_%YYYY%-%MM%-%DD%_%HH%-%Min%-%Sec%.log"
 echo Starting server with logs at: %logfile%
 echo.
 
+REM Restart the server automatically when the code changes
+set "PHISHGUARD_RELOAD=1"
+
 REM Run the server with output to both console and log file
 python phishing_detection.py 2>&1 | tee %logfile%
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Regression tests for the rule-based phishing checks
+"""
+
+import os
+import sys
+import time
+
+# The rule-based checks never call Gemini, so a placeholder key is enough to import the module
+os.environ.setdefault('GEMINI_API_KEY', 'test-key')
+
+from phishing_detection import check_sender_spoofing, check_suspicious_sender, extract_features
+
+# Each adversarial input must be checked within this many seconds
+TIME_LIMIT = 1.0
+
+SENDER_SPOOFING_CASES = [
+    ("'PayPal's Security Team' <a@evil.tk>", True),
+    ('"Amazon "Prime" Billing" <a@b.tk>', True),
+    ('"PayPal\'s Team" <x@evil.com>', True),
+    ('"The \\"PayPal\\" Team" <x@evil.com>', True),
+    ('From: "PayPal Support" <service@paypa1.com>', True),
+    ("'Apple'\n <a@b.com>", True),
+    ('"PayPal" <service@paypal.com>', False),
+    ('"x" <a@b.com> "Microsoft Support" <ms@evil.com>', True),
+]
+
+SUSPICIOUS_SENDER_CASES = [
+    ('From: alerts@paypal-secure.tk', True),
+    ('a@b.com\nreply to x@y.xyz', True),
+    ('a@b@c.tk', True),
+    ('a@b.tk\n', True),
+    ('a@.tk', True),
+    ('mail me at a@b.tk today', False),
+    ('"@x.tk" <a@b.com>', False),
+    ('a@b.tk\nthanks', False),
+]
+
+# (has_suspicious_links, has_typosquatting) for URLs that end at characters outside RFC 3986
+LINK_CASES = [
+    ('Login at <http://evil.tk> now', (True, False)),
+    ('http://account<a@b.com>https://twitter.co/login', (True, True)),
+    ('see http://urgentx<a@b.com>paypal.comx@x.tk', (False, False)),
+    ('http://example.com/~user/page', (False, False)),
+    ('http://paypa1.com/a^b', (True, True)),
+]
+
+# Inputs at the request size limit that used to make the display-name scan backtrack
+SENDER_SPOOFING_ADVERSARIAL = [
+    ('200k quotes', '"' * 200000),
+    ('"a repeated', '"a' * 100000),
+    ('"\\ repeated', '"\\' * 100000),
+    ('"a" < repeated', '"a" <' * 40000),
+]
+
+# Inputs at the request size limit that used to make the sender pattern backtrack quadratically
+SUSPICIOUS_SENDER_ADVERSARIAL = [
+    ('200k @ characters', '@' * 200000),
+    ('@ followed by dots', '@' + '.' * 199999),
+    ('@. repeated', '@.' * 100000),
+]
+
+def link_flags(text):
+    """Returns the suspicious-link and typosquatting features reported for text"""
+    features = extract_features(text)
+    return features['has_suspicious_links'], features['has_typosquatting']
+
+def run_cases(name, check, cases):
+    """Runs check on every case and reports the ones that do not give the expected result"""
+    failures = [(text, expected) for text, expected in cases if check(text) != expected]
+    for text, expected in failures:
+        print(f"❌ {name}: {text!r} (expected {expected})")
+    if not failures:
+        print(f"✅ {name}: all {len(cases)} cases passed")
+    return not failures
+
+def run_timing(name, check, inputs):
+    """Checks that check handles every adversarial input within TIME_LIMIT seconds"""
+    passed = True
+    for label, text in inputs:
+        start = time.perf_counter()
+        check(text)
+        elapsed = time.perf_counter() - start
+        if elapsed > TIME_LIMIT:
+            print(f"❌ {name}: {label} took {elapsed:.2f}s (limit {TIME_LIMIT}s)")
+            passed = False
+    if passed:
+        print(f"✅ {name}: all {len(inputs)} adversarial inputs finished within {TIME_LIMIT}s")
+    return passed
+
+def test_sender_spoofing():
+    """Test display-name spoofing detection"""
+    return run_cases("sender spoofing", lambda text: bool(check_sender_spoofing(text)), SENDER_SPOOFING_CASES)
+
+def test_sender_spoofing_timing():
+    """Test that display-name spoofing detection stays fast on adversarial input"""
+    return run_timing("sender spoofing timing", check_sender_spoofing, SENDER_SPOOFING_ADVERSARIAL)
+
+def test_suspicious_sender():
+    """Test suspicious sender address detection"""
+    return run_cases("suspicious sender", lambda text: bool(check_suspicious_sender(text)), SUSPICIOUS_SENDER_CASES)
+
+def test_suspicious_sender_timing():
+    """Test that suspicious sender detection stays fast on adversarial input"""
+    return run_timing("suspicious sender timing", check_suspicious_sender, SUSPICIOUS_SENDER_ADVERSARIAL)
+
+def test_link_flags():
+    """Test that URLs are split at characters outside RFC 3986"""
+    return run_cases("link flags", link_flags, LINK_CASES)
+
+def main():
+    print("🧪 Testing rule-based phishing checks...\n")
+
+    results = [
+        test_sender_spoofing(),
+        test_sender_spoofing_timing(),
+        test_suspicious_sender(),
+        test_suspicious_sender_timing(),
+        test_link_flags()
+    ]
+
+    if all(results):
+        print("\n✅ All rule check tests passed!")
+        return 0
+    else:
+        print("\n❌ Some rule check tests failed!")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())